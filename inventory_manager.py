@@ -72,8 +72,8 @@ class EnhancedPMM(ScriptStrategyBase):
         quote_balance = self.connectors[self.config.exchange].get_available_balance(self.quote_asset)
         
       
-        total_value = base_balance * ref_price + quote_balance
         current_base_value = base_balance * ref_price
+        total_value = current_base_value + quote_balance
         inventory_pct = current_base_value / total_value if total_value > 0 else Decimal(0.5)
         max_pct = self.config.max_inventory_pct
         
@@ -0,0 +1,173 @@
+"""
+Shared config fields and strategy plumbing for the enhanced PMM scripts.
+Keep this file next to trend_analyzer.py / violity_indicator.py in hummingbot's scripts/ folder.
+"""
+import logging
+from decimal import Decimal
+from operator import attrgetter
+from typing import Dict, List
+
+import numpy as np
+from pydantic import Field
+
+from hummingbot.client.config.config_data_types import BaseClientModel, ClientFieldData
+from hummingbot.connector.connector_base import ConnectorBase
+from hummingbot.core.data_type.common import PriceType, TradeType
+from hummingbot.core.data_type.order_candidate import OrderCandidate
+from hummingbot.core.event.events import OrderFilledEvent
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional, fall back to plain Python
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+_GET_HIGH = attrgetter("high")
+_GET_LOW = attrgetter("low")
+_GET_CLOSE = attrgetter("close")
+
+_PROMPTS: Dict[str, ClientFieldData] = {}
+
+
+def _cd(msg: str) -> ClientFieldData:
+    """Shared prompt-on-new ClientFieldData for a prompt string"""
+    client_data = _PROMPTS.get(msg)
+    if client_data is None:
+        client_data = _PROMPTS[msg] = ClientFieldData(prompt_on_new=True, prompt=lambda mi, m=msg: m)
+    return client_data
+
+
+class _BasePMMConfig(BaseClientModel):
+    exchange: str = Field("binance_paper_trade", client_data=_cd("Exchange where the bot will trade"))
+    trading_pair: str = Field("ETH-USDT", client_data=_cd("Trading pair in which the bot will place orders"))
+    order_amount: Decimal = Field(0.01, client_data=_cd("Order amount (denominated in base asset)"))
+    bid_spread: Decimal = Field(0.001, client_data=_cd("Bid order spread (in percent)"))
+    ask_spread: Decimal = Field(0.001, client_data=_cd("Ask order spread (in percent)"))
+    order_refresh_time: int = Field(15, client_data=_cd("Order refresh time (in seconds)"))
+    price_type: str = Field("mid", client_data=_cd("Price type to use (mid or last)"))
+    max_inventory_pct: Decimal = Field(0.5, client_data=_cd("Maximum inventory percentage (0-1)"))
+
+
+class _BaseEnhancedPMM:
+    """
+    Mixin with the order plumbing shared by the enhanced PMM scripts; combine with ScriptStrategyBase
+    """
+
+    create_timestamp = 0
+    price_source = PriceType.MidPrice
+
+    @classmethod
+    def init_markets(cls, config: _BasePMMConfig):
+        cls.markets = {config.exchange: {config.trading_pair}}
+        cls.price_source = PriceType.LastTrade if config.price_type == "last" else PriceType.MidPrice
+
+    def __init__(self, connectors: Dict[str, ConnectorBase], config: _BasePMMConfig):
+        super().__init__(connectors)
+        self.config = config
+        self._exchange = self.config.exchange
+        self._pair = self.config.trading_pair
+        self._connector = None
+        self.base_asset, self.quote_asset = self._pair.split("-")
+        self._order_amount = float(self.config.order_amount)
+        self._max_pct = float(self.config.max_inventory_pct)
+        self._candle_cache_ts = None
+        self._candle_cache = None
+        self._candle_cache_rows = 0
+        self._last_signature = None
+        self._log = self.logger()
+
+    def on_tick(self):
+        if self._connector is None:
+            self._connector = self.connectors[self._exchange]
+        if self.create_timestamp <= self.current_timestamp:
+            self.update_indicators()
+            connector = self._connector
+            ref_price = float(connector.get_price_by_type(self._pair, self.price_source))
+            base_balance = float(connector.get_available_balance(self.base_asset))
+            quote_balance = float(connector.get_available_balance(self.quote_asset))
+            signature = self.quote_signature(ref_price, base_balance, quote_balance)
+            if signature == self._last_signature and self.both_sides_resting():
+                # nothing moved since the last quote, keep the resting orders instead of cancel + replace
+                self.create_timestamp = self.config.order_refresh_time + self.current_timestamp
+                return
+            self._last_signature = signature
+            self.cancel_all_orders()
+            proposal: List[OrderCandidate] = self.create_proposal(ref_price, base_balance, quote_balance)
+            proposal_adjusted: List[OrderCandidate] = self.adjust_proposal_to_budget(proposal)
+            self.place_orders(proposal_adjusted)
+            self.create_timestamp = self.config.order_refresh_time + self.current_timestamp
+
+    def update_indicators(self):
+        """Advance indicator state before each refresh"""
+
+    def indicator_signature(self):
+        """Indicator values that feed the quote, compared between refreshes"""
+        return None
+
+    def quote_signature(self, ref_price: float, base_balance: float, quote_balance: float):
+        """Rounded quote inputs; an unchanged signature means the resting orders are still valid"""
+        return (
+            round(ref_price, 6),
+            round(base_balance, 6),
+            round(quote_balance, 6),
+            self.indicator_signature(),
+        )
+
+    def both_sides_resting(self) -> bool:
+        sides = {order.is_buy for order in self.get_active_orders(connector_name=self._exchange)}
+        return len(sides) == 2
+
+    def get_candles(self, number_of_rows: int):
+        """Return (highs, lows, closes) of the latest 1m candles, fetched at most once per candle"""
+        bucket = int(self.current_timestamp // 60)
+        # key on the rows asked for, not the rows returned, so a short history is also cached for the bucket
+        if bucket != self._candle_cache_ts or number_of_rows > self._candle_cache_rows:
+            history = self._connector.get_trading_pairs_historical_prices(
+                trading_pair=self._pair,
+                period="1m",
+                number_of_rows=number_of_rows
+            )
+            n = len(history)
+            self._candle_cache = (
+                np.fromiter(map(_GET_HIGH, history), dtype=np.float64, count=n),
+                np.fromiter(map(_GET_LOW, history), dtype=np.float64, count=n),
+                np.fromiter(map(_GET_CLOSE, history), dtype=np.float64, count=n),
+            )
+            self._candle_cache_ts = bucket
+            self._candle_cache_rows = number_of_rows
+        highs, lows, closes = self._candle_cache
+        return highs[-number_of_rows:], lows[-number_of_rows:], closes[-number_of_rows:]
+
+    def get_closed_candles(self, number_of_rows: int):
+        """Like get_candles, but drops the newest row, which is the still-open candle of the current minute"""
+        highs, lows, closes = self.get_candles(number_of_rows + 1)
+        return highs[:-1], lows[:-1], closes[:-1]
+
+    def adjust_proposal_to_budget(self, proposal: List[OrderCandidate]) -> List[OrderCandidate]:
+        return self._connector.budget_checker.adjust_candidates(proposal, all_or_none=True)
+
+    def place_orders(self, proposal: List[OrderCandidate]) -> None:
+        for order in proposal:
+            self.place_order(connector_name=self._exchange, order=order)
+
+    def place_order(self, connector_name: str, order: OrderCandidate):
+        if order.order_side == TradeType.SELL:
+            self.sell(connector_name=connector_name, trading_pair=order.trading_pair, amount=order.amount,
+                      order_type=order.order_type, price=order.price)
+        elif order.order_side == TradeType.BUY:
+            self.buy(connector_name=connector_name, trading_pair=order.trading_pair, amount=order.amount,
+                     order_type=order.order_type, price=order.price)
+
+    def cancel_all_orders(self):
+        for order in self.get_active_orders(connector_name=self._exchange):
+            self.cancel(self._exchange, order.trading_pair, order.client_order_id)
+
+    def did_fill_order(self, event: OrderFilledEvent):
+        msg = (f"{event.trade_type.name} {round(event.amount, 2)} {event.trading_pair} {self._exchange} at {round(event.price, 2)}")
+        self.log_with_clock(logging.INFO, msg)
+        self.notify_hb_app_with_timestamp(msg)
@@ -123,8 +123,8 @@ class EnhancedPMM(ScriptStrategyBase):
         sell_price = ref_price * Decimal(1 + self.config.ask_spread)
         base_balance = self.connectors[self.config.exchange].get_available_balance(self.base_asset)
         quote_balance = self.connectors[self.config.exchange].get_available_balance(self.quote_asset)
-        total_value = base_balance * ref_price + quote_balance
         current_base_value = base_balance * ref_price
+        total_value = current_base_value + quote_balance
         inventory_pct = current_base_value / total_value if total_value > Decimal("0") else Decimal("0.5")
         sma = self.calculate_sma()
         trend_factor = 0
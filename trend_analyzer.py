@@ -6,150 +6,217 @@ from typing import Dict, List
 
 from pydantic import Field
 
-from hummingbot.client.config.config_data_types import BaseClientModel, ClientFieldData
 from hummingbot.connector.connector_base import ConnectorBase
-from hummingbot.core.data_type.common import OrderType, PriceType, TradeType
+from hummingbot.core.data_type.common import OrderType, TradeType
 from hummingbot.core.data_type.order_candidate import OrderCandidate
-from hummingbot.core.event.events import OrderFilledEvent
 from hummingbot.strategy.script_strategy_base import ScriptStrategyBase
 
-
-class EnhancedPMMConfig(BaseClientModel):
+from scripts.pmm_common import _BaseEnhancedPMM, _BasePMMConfig, _cd, njit, prange
+
+
+@njit(cache=True)
+def _quote_math(ref_price, base_bal, quote_bal, order_amt, bid_mult, ask_mult, max_pct, sma):
+    buy_price = ref_price * bid_mult
+    sell_price = ref_price * ask_mult
+
+    current_base_value = base_bal * ref_price
+    total_value = current_base_value + quote_bal
+    inventory_pct = current_base_value / total_value if total_value > 0.0 else 0.5
+
+    buy_amount = order_amt
+    sell_amount = order_amt
+    trend_factor = 0.0
+    if sma > 0.0:
+        trend_factor = (ref_price - sma) / sma
+        # branchless max(trend_factor, 0) / min(trend_factor, 0)
+        abs_trend = abs(trend_factor)
+        buy_amount = order_amt * (1.0 - 0.5 * (trend_factor + abs_trend))
+        sell_amount = order_amt * (1.0 + 0.5 * (trend_factor - abs_trend))
+
+    if inventory_pct > max_pct:
+        buy_amount = max(buy_amount * (1.0 - ((inventory_pct - max_pct) * 2.0)), 0.001)
+    elif inventory_pct < 1.0 - max_pct:
+        sell_amount = max(sell_amount * (1.0 - ((1.0 - max_pct - inventory_pct) * 2.0)), 0.001)
+
+    return buy_price, sell_price, buy_amount, sell_amount, inventory_pct, trend_factor
+
+
+@njit(parallel=True, cache=True)
+def _vector_backtest(ref, base, quote, closes, period, bid_mult, ask_mult, max_pct, order_amt):
+    n = ref.shape[0]
+    csum = np.zeros(n + 1)
+    csum[1:] = np.cumsum(closes)
+    # sma[i] averages the period closes before bar i, as the live path only averages closed candles
+    sma = np.full(n, np.nan)
+    if n > period:
+        sma[period:] = (csum[period:n] - csum[:n - period]) / period
+
+    buy_prices = np.empty(n)
+    sell_prices = np.empty(n)
+    buy_amounts = np.empty(n)
+    sell_amounts = np.empty(n)
+    for i in prange(n):
+        buy_price, sell_price, buy_amount, sell_amount, _, _ = _quote_math(
+            ref[i], base[i], quote[i], order_amt, bid_mult, ask_mult, max_pct, sma[i])
+        buy_prices[i] = buy_price
+        sell_prices[i] = sell_price
+        buy_amounts[i] = buy_amount
+        sell_amounts[i] = sell_amount
+    return buy_prices, sell_prices, buy_amounts, sell_amounts
+
+
+@njit(parallel=True, cache=True)
+def _panel_quote(ref, base, quote, amt, bid_mult, ask_mult, max_pct, closes):
+    n_pairs = ref.shape[0]
+    period = closes.shape[1]
+    buy_prices = np.empty(n_pairs)
+    sell_prices = np.empty(n_pairs)
+    buy_amounts = np.empty(n_pairs)
+    sell_amounts = np.empty(n_pairs)
+    for p in prange(n_pairs):
+        sma = closes[p].sum() / period
+        buy_price, sell_price, buy_amount, sell_amount, _, _ = _quote_math(
+            ref[p], base[p], quote[p], amt[p], bid_mult[p], ask_mult[p], max_pct[p], sma)
+        buy_prices[p] = buy_price
+        sell_prices[p] = sell_price
+        buy_amounts[p] = buy_amount
+        sell_amounts[p] = sell_amount
+    return buy_prices, sell_prices, buy_amounts, sell_amounts
+
+
+class EnhancedPMMConfig(_BasePMMConfig):
     script_file_name: str = Field(default_factory=lambda: os.path.basename(__file__))
-    exchange: str = Field("binance_paper_trade", client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "Exchange where the bot will trade"))
-    trading_pair: str = Field("ETH-USDT", client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "Trading pair in which the bot will place orders"))
-    order_amount: Decimal = Field(0.01, client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "Order amount (denominated in base asset)"))
-    bid_spread: Decimal = Field(0.001, client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "Bid order spread (in percent)"))
-    ask_spread: Decimal = Field(0.001, client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "Ask order spread (in percent)"))
-    order_refresh_time: int = Field(15, client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "Order refresh time (in seconds)"))
-    price_type: str = Field("mid", client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "Price type to use (mid or last)"))
-    max_inventory_pct: Decimal = Field(0.5, client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "Maximum inventory percentage (0-1)"))
-    sma_period: int = Field(50, client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "SMA period for trend"))
-
-
-class EnhancedPMM(ScriptStrategyBase):
+    sma_period: int = Field(50, client_data=_cd("SMA period for trend"))
+
+
+class EnhancedPMM(_BaseEnhancedPMM, ScriptStrategyBase):
     """
     Enhanced PMM with basic inventory management and trend analysis
     """
 
-    create_timestamp = 0
-    price_source = PriceType.MidPrice
-
-    @classmethod
-    def init_markets(cls, config: EnhancedPMMConfig):
-        cls.markets = {config.exchange: {config.trading_pair}}
-        cls.price_source = PriceType.LastTrade if config.price_type == "last" else PriceType.MidPrice
-
     def __init__(self, connectors: Dict[str, ConnectorBase], config: EnhancedPMMConfig):
-        super().__init__(connectors)
-        self.config = config
-        self.base_asset = self.config.trading_pair.split("-")[0]
-        self.quote_asset = self.config.trading_pair.split("-")[1]
-        self.sma_values = []
-
-    def on_tick(self):
-        if self.create_timestamp <= self.current_timestamp:
-            self.cancel_all_orders()
-            proposal: List[OrderCandidate] = self.create_proposal()
-            proposal_adjusted: List[OrderCandidate] = self.adjust_proposal_to_budget(proposal)
-            self.place_orders(proposal_adjusted)
-            self.create_timestamp = self.config.order_refresh_time + self.current_timestamp
-
-    def calculate_sma(self):
-        """Calculate Simple Moving Average"""
+        super().__init__(connectors, config)
+        self._close_ring = np.zeros(self.config.sma_period, dtype=np.float64)
+        self._ring_idx = 0
+        self._ring_full = False
+        self._close_sum = 0.0
+        self._inv_sma_period = 1.0 / self.config.sma_period
+        self._close_bucket = None
+        self._bid_mult = 1.0 - float(self.config.bid_spread)
+        self._ask_mult = 1.0 + float(self.config.ask_spread)
+
+    def update_indicators(self):
+        """Feed every closed 1m candle since the last update into the SMA window"""
+        closed_bucket = int(self.current_timestamp // 60) - 1
+        if closed_bucket == self._close_bucket:
+            return
+        period = self.config.sma_period
+        # refreshes can be further apart than a minute (or a fetch can fail), so catch up on every missed candle
+        missing = period if self._close_bucket is None else min(closed_bucket - self._close_bucket, period)
         try:
-            connector = self.connectors[self.config.exchange]
-            history = connector.get_trading_pairs_historical_prices(
-                trading_pair=self.config.trading_pair,
-                period="1m",
-                number_of_rows=self.config.sma_period
-            )
-            
-            if len(history) < self.config.sma_period:
-                return None
-            
-            closes = [float(row.close) for row in history]
-            return np.mean(closes[-self.config.sma_period:])
+            _, _, closes = self.get_closed_candles(missing)
+            for close in closes.tolist():
+                self._ingest_latest_close(close)
+            self._close_bucket = closed_bucket
         except Exception as e:
-            self.log_with_clock(logging.ERROR, f"Error calculating SMA: {str(e)}")
+            self.log_with_clock(logging.ERROR, f"Error updating SMA window: {str(e)}")
+
+    def _ingest_latest_close(self, price: float):
+        idx = self._ring_idx
+        self._close_sum += price - self._close_ring.item(idx)
+        self._close_ring[idx] = price
+        self._ring_idx = (idx + 1) % self.config.sma_period
+        if self._ring_idx == 0:
+            # re-sum once per lap so float drift from the running updates can't accumulate
+            self._close_sum = float(np.add.reduce(self._close_ring))
+            self._ring_full = True
+
+    def calculate_sma(self):
+        """Calculate Simple Moving Average from the rolling close sum"""
+        if not self._ring_full:
             return None
+        return self._close_sum * self._inv_sma_period
+
+    def indicator_signature(self):
+        sma = self.calculate_sma()
+        return None if sma is None else round(sma, 6)
 
-    def create_proposal(self) -> List[OrderCandidate]:
-        ref_price = self.connectors[self.config.exchange].get_price_by_type(self.config.trading_pair, self.price_source)
+    def create_proposal(self, ref_price: float, base_balance: float, quote_balance: float) -> List[OrderCandidate]:
         sma = self.calculate_sma()
-        
-        buy_price = ref_price * Decimal(1 - self.config.bid_spread)
-        sell_price = ref_price * Decimal(1 + self.config.ask_spread)
-        base_balance = self.connectors[self.config.exchange].get_available_balance(self.base_asset)
-        quote_balance = self.connectors[self.config.exchange].get_available_balance(self.quote_asset)
-    
-        total_value = base_balance * ref_price + quote_balance
-        current_base_value = base_balance * ref_price
-        inventory_pct = current_base_value / total_value if total_value > Decimal(0) else Decimal(0.5)
-        
-        buy_amount = self.config.order_amount
-        sell_amount = self.config.order_amount
-        
-        trend_factor = 0
-        if sma is not None:
-            current_price = float(ref_price)
-            trend_factor = (current_price - sma) / sma  
-           
-            buy_amount = self.config.order_amount * Decimal(1 - max(trend_factor, 0))
-            sell_amount = self.config.order_amount * Decimal(1 + min(trend_factor, 0))
-            self.log_with_clock(logging.INFO, f"Trend factor: {trend_factor:.4f}, SMA: {sma:.2f}")
-        
-        max_pct = self.config.max_inventory_pct
-        
-        if inventory_pct > max_pct:
-            buy_amount = buy_amount * (Decimal(1) - ((inventory_pct - max_pct) * Decimal(2)))
-            buy_amount = max(buy_amount, Decimal("0.001")) 
-       
-        elif inventory_pct < (Decimal(1) - max_pct):
-            sell_amount = sell_amount * (Decimal(1) - ((Decimal(1) - max_pct - inventory_pct) * Decimal(2)))
-            sell_amount = max(sell_amount, Decimal("0.001")) 
-        
-        self.log_with_clock(logging.INFO, 
-                           f"Inventory: {inventory_pct:.2%}, Buy amount: {buy_amount}, Sell amount: {sell_amount}")
-
-        buy_order = OrderCandidate(trading_pair=self.config.trading_pair, is_maker=True, order_type=OrderType.LIMIT,
-                                order_side=TradeType.BUY, amount=buy_amount, price=buy_price)
-
-        sell_order = OrderCandidate(trading_pair=self.config.trading_pair, is_maker=True, order_type=OrderType.LIMIT,
-                                order_side=TradeType.SELL, amount=sell_amount, price=sell_price)
+
+        buy_price, sell_price, buy_amount, sell_amount, inventory_pct, trend_factor = _quote_math(
+            ref_price, base_balance, quote_balance, self._order_amount, self._bid_mult, self._ask_mult,
+            self._max_pct, sma if sma is not None else np.nan)
+
+        if self._log.isEnabledFor(logging.INFO):
+            if sma is not None:
+                self.log_with_clock(logging.INFO, f"Trend factor: {trend_factor:.4f}, SMA: {sma:.2f}")
+            self.log_with_clock(logging.INFO, 
+                               f"Inventory: {inventory_pct:.2%}, Buy amount: {buy_amount:.8f}, Sell amount: {sell_amount:.8f}")
+
+        buy_order = OrderCandidate(trading_pair=self._pair, is_maker=True, order_type=OrderType.LIMIT,
+                                order_side=TradeType.BUY, amount=Decimal(repr(buy_amount)),
+                                price=Decimal(repr(buy_price)))
+
+        sell_order = OrderCandidate(trading_pair=self._pair, is_maker=True, order_type=OrderType.LIMIT,
+                                order_side=TradeType.SELL, amount=Decimal(repr(sell_amount)),
+                                price=Decimal(repr(sell_price)))
 
         return [buy_order, sell_order]
 
-    def adjust_proposal_to_budget(self, proposal: List[OrderCandidate]) -> List[OrderCandidate]:
-        proposal_adjusted = self.connectors[self.config.exchange].budget_checker.adjust_candidates(proposal, all_or_none=True)
-        return proposal_adjusted
-
-    def place_orders(self, proposal: List[OrderCandidate]) -> None:
-        for order in proposal:
-            self.place_order(connector_name=self.config.exchange, order=order)
-
-    def place_order(self, connector_name: str, order: OrderCandidate):
-        if order.order_side == TradeType.SELL:
-            self.sell(connector_name=connector_name, trading_pair=order.trading_pair, amount=order.amount,
-                    order_type=order.order_type, price=order.price)
-        elif order.order_side == TradeType.BUY:
-            self.buy(connector_name=connector_name, trading_pair=order.trading_pair, amount=order.amount,
-                    order_type=order.order_type, price=order.price)
-
-    def cancel_all_orders(self):
-        for order in self.get_active_orders(connector_name=self.config.exchange):
-            self.cancel(self.config.exchange, order.trading_pair, order.client_order_id)
-
-    def did_fill_order(self, event: OrderFilledEvent):
-        msg = (f"{event.trade_type.name} {round(event.amount, 2)} {event.trading_pair} {self.config.exchange} at {round(event.price, 2)}")
-        self.log_with_clock(logging.INFO, msg)
-        self.notify_hb_app_with_timestamp(msg)
+
+def backtest_quote_series(config: EnhancedPMMConfig, ref_prices, base_bals, quote_bals, closes):
+    """
+    Replay the proposal math over whole series (one value per bar) and return
+    (buy_prices, sell_prices, buy_amounts, sell_amounts) as float arrays.
+    closes[i] is the close of bar i and ref_prices[i] the price when the bar-i quote is made, so the
+    bar-i quote uses the SMA of closes[i - sma_period .. i - 1]; the first sma_period bars quote without SMA.
+    """
+    ref = np.asarray(ref_prices, dtype=np.float64)
+    base = np.asarray(base_bals, dtype=np.float64)
+    quote = np.asarray(quote_bals, dtype=np.float64)
+    closes = np.asarray(closes, dtype=np.float64)
+    # the kernel does no bounds checking, so mismatched series would read past the end instead of raising
+    if ref.ndim != 1 or not (ref.shape == base.shape == quote.shape == closes.shape):
+        raise ValueError(f"ref_prices, base_bals, quote_bals and closes must be 1-D series of equal length, got "
+                         f"{ref.shape}, {base.shape}, {quote.shape}, {closes.shape}")
+    return _vector_backtest(
+        ref,
+        base,
+        quote,
+        closes,
+        config.sma_period,
+        1.0 - float(config.bid_spread),
+        1.0 + float(config.ask_spread),
+        float(config.max_inventory_pct),
+        float(config.order_amount),
+    )
+
+
+def quote_panel(configs: List[EnhancedPMMConfig], ref_prices, base_bals, quote_bals, closes):
+    """
+    Quote a panel of trading pairs in one parallel pass; closes is a (pairs, sma_period) array of each
+    pair's latest closes. Returns (buy_prices, sell_prices, buy_amounts, sell_amounts) as float arrays.
+    Only pays off over a handful of pairs, below that the per-pair path is as fast.
+    """
+    n_pairs = len(configs)
+    ref = np.asarray(ref_prices, dtype=np.float64)
+    base = np.asarray(base_bals, dtype=np.float64)
+    quote = np.asarray(quote_bals, dtype=np.float64)
+    closes = np.asarray(closes, dtype=np.float64)
+    # the kernel does no bounds checking, so mismatched inputs would read past the end instead of raising
+    if not (ref.shape == base.shape == quote.shape == (n_pairs,)) or closes.ndim != 2 or closes.shape[0] != n_pairs:
+        raise ValueError(f"expected {n_pairs} ref_prices, base_bals and quote_bals and a ({n_pairs}, sma_period) "
+                         f"closes array, got {ref.shape}, {base.shape}, {quote.shape}, {closes.shape}")
+    if any(c.sma_period != closes.shape[1] for c in configs):
+        raise ValueError(f"every config's sma_period must equal the closes window ({closes.shape[1]})")
+    return _panel_quote(
+        ref,
+        base,
+        quote,
+        np.fromiter((float(c.order_amount) for c in configs), dtype=np.float64, count=n_pairs),
+        np.fromiter((1.0 - float(c.bid_spread) for c in configs), dtype=np.float64, count=n_pairs),
+        np.fromiter((1.0 + float(c.ask_spread) for c in configs), dtype=np.float64, count=n_pairs),
+        np.fromiter((float(c.max_inventory_pct) for c in configs), dtype=np.float64, count=n_pairs),
+        closes,
+    )
@@ -6,176 +6,136 @@ from typing import Dict, List
 
 from pydantic import Field
 
-from hummingbot.client.config.config_data_types import BaseClientModel, ClientFieldData
 from hummingbot.connector.connector_base import ConnectorBase
-from hummingbot.core.data_type.common import OrderType, PriceType, TradeType
+from hummingbot.core.data_type.common import OrderType, TradeType
 from hummingbot.core.data_type.order_candidate import OrderCandidate
-from hummingbot.core.event.events import OrderFilledEvent
 from hummingbot.strategy.script_strategy_base import ScriptStrategyBase
 
+from scripts.pmm_common import _BaseEnhancedPMM, _BasePMMConfig, _cd, njit
 
-class EnhancedPMMConfig(BaseClientModel):
+
+@njit(cache=True, fastmath=True)
+def _true_ranges(highs, lows, prev_closes):
+    return np.maximum(highs - lows, np.maximum(np.abs(highs - prev_closes), np.abs(lows - prev_closes)))
+
+
+@njit(cache=True, fastmath=True)
+def _atr_core(highs, lows, prev_closes, period):
+    return _true_ranges(highs, lows, prev_closes)[-period:].mean()
+
+
+@njit(cache=True, fastmath={"contract"})
+def _quote_math(ref_price, base_bal, quote_bal, order_amt, bid_spread, ask_spread, max_pct, vol_mult, atr):
+    # work in price offsets, ref * (1 - (spread + atr / ref * mult)) == ref - (spread * ref + mult * atr),
+    # so the atr / ref division goes away and the "contract" flag lets LLVM fuse each side's multiply-add
+    vol_offset = vol_mult * atr
+    min_offset = 0.001 * ref_price
+    bid_offset = max(bid_spread * ref_price + vol_offset, min_offset)
+    ask_offset = max(ask_spread * ref_price + vol_offset, min_offset)
+
+    buy_price = ref_price - bid_offset
+    sell_price = ref_price + ask_offset
+
+    inv_ref = 1.0 / ref_price
+    volatility_spread = vol_offset * inv_ref
+    eff_bid_spread = bid_offset * inv_ref
+    eff_ask_spread = ask_offset * inv_ref
+
+    current_base_value = base_bal * ref_price
+    total_value = current_base_value + quote_bal
+    inventory_pct = current_base_value / total_value if total_value > 0.0 else 0.5
+
+    buy_amount = order_amt
+    sell_amount = order_amt
+    if inventory_pct > max_pct:
+        buy_amount = max(order_amt * (1.0 - ((inventory_pct - max_pct) * 2.0)), 0.001)
+    elif inventory_pct < 1.0 - max_pct:
+        sell_amount = max(order_amt * (1.0 - ((1.0 - max_pct - inventory_pct) * 2.0)), 0.001)
+
+    return buy_price, sell_price, buy_amount, sell_amount, volatility_spread, eff_bid_spread, eff_ask_spread, inventory_pct
+
+
+class EnhancedPMMConfig(_BasePMMConfig):
     script_file_name: str = Field(default_factory=lambda: os.path.basename(__file__))
-    exchange: str = Field("binance_paper_trade", client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "Exchange where the bot will trade"))
-    trading_pair: str = Field("ETH-USDT", client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "Trading pair in which the bot will place orders"))
-    order_amount: Decimal = Field(0.01, client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "Order amount (denominated in base asset)"))
-    bid_spread: Decimal = Field(0.001, client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "Bid order spread (in percent)"))
-    ask_spread: Decimal = Field(0.001, client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "Ask order spread (in percent)"))
-    order_refresh_time: int = Field(15, client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "Order refresh time (in seconds)"))
-    price_type: str = Field("mid", client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "Price type to use (mid or last)"))
-    max_inventory_pct: Decimal = Field(0.5, client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "Maximum inventory percentage (0-1)"))
-    atr_period: int = Field(14, client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "ATR period for volatility"))
-    volatility_multiplier: Decimal = Field(2.0, client_data=ClientFieldData(
-        prompt_on_new=True, prompt=lambda mi: "Volatility spread multiplier"))
-
-
-class EnhancedPMM(ScriptStrategyBase):
+    atr_period: int = Field(14, client_data=_cd("ATR period for volatility"))
+    volatility_multiplier: Decimal = Field(2.0, client_data=_cd("Volatility spread multiplier"))
+
+
+class EnhancedPMM(_BaseEnhancedPMM, ScriptStrategyBase):
     """
     Enhanced PMM with basic inventory management and volatility adjustment (ATR)
     """
 
-    create_timestamp = 0
-    price_source = PriceType.MidPrice
-
-    @classmethod
-    def init_markets(cls, config: EnhancedPMMConfig):
-        cls.markets = {config.exchange: {config.trading_pair}}
-        cls.price_source = PriceType.LastTrade if config.price_type == "last" else PriceType.MidPrice
-
     def __init__(self, connectors: Dict[str, ConnectorBase], config: EnhancedPMMConfig):
-        super().__init__(connectors)
-        self.config = config
-        self.base_asset = self.config.trading_pair.split("-")[0]
-        self.quote_asset = self.config.trading_pair.split("-")[1]
-
-    def on_tick(self):
-        if self.create_timestamp <= self.current_timestamp:
-            self.cancel_all_orders()
-            proposal: List[OrderCandidate] = self.create_proposal()
-            proposal_adjusted: List[OrderCandidate] = self.adjust_proposal_to_budget(proposal)
-            self.place_orders(proposal_adjusted)
-            self.create_timestamp = self.config.order_refresh_time + self.current_timestamp
+        super().__init__(connectors, config)
+        self._bid_spread = float(self.config.bid_spread)
+        self._ask_spread = float(self.config.ask_spread)
+        self._vol_mult = float(self.config.volatility_multiplier)
+        self._atr_prev = None
+        self._atr_bucket = None
 
     def calculate_atr(self):
-        """Calculate Average True Range"""
-        connector = self.connectors[self.config.exchange]
-        history = connector.get_trading_pairs_historical_prices(
-            trading_pair=self.config.trading_pair,
-            period="1m",
-            number_of_rows=self.config.atr_period + 1
-        )
-        
-        if len(history) < self.config.atr_period + 1:
-            return Decimal("0")
-
-        true_ranges = []
-        for i in range(1, len(history)):
-            high = float(history[i].high)
-            low = float(history[i].low)
-            prev_close = float(history[i-1].close)
-            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
-            true_ranges.append(tr)
-        
-        return Decimal(str(np.mean(true_ranges[-self.config.atr_period:]))) if true_ranges else Decimal("0")
-
-    def create_proposal(self) -> List[OrderCandidate]:
-        connector = self.connectors[self.config.exchange]
-        ref_price = connector.get_price_by_type(self.config.trading_pair, self.price_source)
-        
+        """Calculate Average True Range, seeded once and then updated with Wilder's smoothing"""
+        closed_bucket = int(self.current_timestamp // 60) - 1
+        if closed_bucket == self._atr_bucket:
+            return self._atr_prev
 
-        atr = self.calculate_atr()
-        volatility_spread = (atr / ref_price) * self.config.volatility_multiplier
-        bid_spread = max(self.config.bid_spread + volatility_spread, Decimal("0.001"))
-        ask_spread = max(self.config.ask_spread + volatility_spread, Decimal("0.001"))
-        
-        buy_price = ref_price * (Decimal("1") - bid_spread)
-        sell_price = ref_price * (Decimal("1") + ask_spread)
-
-        
-        base_balance = connector.get_available_balance(self.base_asset)
-        quote_balance = connector.get_available_balance(self.quote_asset)
-        total_value = base_balance * ref_price + quote_balance
-        current_base_value = base_balance * ref_price
-        inventory_pct = current_base_value / total_value if total_value > Decimal("0") else Decimal("0.5")
-        max_pct = self.config.max_inventory_pct
-        
-        if inventory_pct > max_pct:
-            buy_amount = self.config.order_amount * (Decimal("1") - ((inventory_pct - max_pct) * Decimal("2")))
-            buy_amount = max(buy_amount, Decimal("0.001"))
-            sell_amount = self.config.order_amount
-        elif inventory_pct < (Decimal("1") - max_pct):
-            sell_amount = self.config.order_amount * (Decimal("1") - ((Decimal("1") - max_pct - inventory_pct) * Decimal("2")))
-            sell_amount = max(sell_amount, Decimal("0.001"))
-            buy_amount = self.config.order_amount
+        period = self.config.atr_period
+        if self._atr_prev is None:
+            highs, lows, closes = self.get_closed_candles(period + 1)
+
+            if len(closes) < period + 1:
+                return 0.0
+
+            self._atr_prev = float(_atr_core(highs[1:], lows[1:], closes[:-1], period))
         else:
-            buy_amount = self.config.order_amount
-            sell_amount = self.config.order_amount
+            # fold in every candle closed since the last update, each against the close before it
+            highs, lows, closes = self.get_closed_candles(closed_bucket - self._atr_bucket + 1)
+
+            if len(closes) < 2:
+                return self._atr_prev
+
+            atr = self._atr_prev
+            for tr in _true_ranges(highs[1:], lows[1:], closes[:-1]).tolist():
+                atr = (atr * (period - 1) + tr) / period
+            self._atr_prev = atr
+
+        self._atr_bucket = closed_bucket
+        return self._atr_prev
+
+    def indicator_signature(self):
+        return round(self.calculate_atr(), 6)
+
+    def create_proposal(self, ref_price: float, base_balance: float, quote_balance: float) -> List[OrderCandidate]:
+        atr = self.calculate_atr()
+
+        (buy_price, sell_price, buy_amount, sell_amount,
+         volatility_spread, bid_spread, ask_spread, inventory_pct) = _quote_math(
+            ref_price, base_balance, quote_balance, self._order_amount, self._bid_spread, self._ask_spread,
+            self._max_pct, self._vol_mult, atr)
 
-        self.log_with_clock(logging.INFO, 
-            f"Volatility Spread: {volatility_spread:.4%}, "
-            f"Bid/Ask Spreads: {bid_spread:.4%}/{ask_spread:.4%}, "
-            f"Inventory: {inventory_pct:.2%}"
-        )
+        if self._log.isEnabledFor(logging.INFO):
+            self.log_with_clock(logging.INFO, 
+                f"Volatility Spread: {volatility_spread:.4%}, "
+                f"Bid/Ask Spreads: {bid_spread:.4%}/{ask_spread:.4%}, "
+                f"Inventory: {inventory_pct:.2%}"
+            )
 
         return [
             OrderCandidate(
-                trading_pair=self.config.trading_pair,
+                trading_pair=self._pair,
                 is_maker=True,
                 order_type=OrderType.LIMIT,
                 order_side=TradeType.BUY,
-                amount=buy_amount,
-                price=buy_price
+                amount=Decimal(repr(buy_amount)),
+                price=Decimal(repr(buy_price))
             ),
             OrderCandidate(
-                trading_pair=self.config.trading_pair,
+                trading_pair=self._pair,
                 is_maker=True,
                 order_type=OrderType.LIMIT,
                 order_side=TradeType.SELL,
-                amount=sell_amount,
-                price=sell_price
+                amount=Decimal(repr(sell_amount)),
+                price=Decimal(repr(sell_price))
             )
         ]
-
-    def adjust_proposal_to_budget(self, proposal: List[OrderCandidate]) -> List[OrderCandidate]:
-        return self.connectors[self.config.exchange].budget_checker.adjust_candidates(proposal, all_or_none=True)
-
-    def place_orders(self, proposal: List[OrderCandidate]) -> None:
-        for order in proposal:
-            self.place_order(connector_name=self.config.exchange, order=order)
-
-    def place_order(self, connector_name: str, order: OrderCandidate):
-        if order.order_side == TradeType.SELL:
-            self.sell(
-                connector_name=connector_name,
-                trading_pair=order.trading_pair,
-                amount=order.amount,
-                order_type=order.order_type,
-                price=order.price
-            )
-        elif order.order_side == TradeType.BUY:
-            self.buy(
-                connector_name=connector_name,
-                trading_pair=order.trading_pair,
-                amount=order.amount,
-                order_type=order.order_type,
-                price=order.price
-            )
-
-    def cancel_all_orders(self):
-        for order in self.get_active_orders(self.config.exchange):
-            self.cancel(self.config.exchange, order.trading_pair, order.client_order_id)
-
-    def did_fill_order(self, event: OrderFilledEvent):
-        msg = (f"{event.trade_type.name} {round(event.amount, 2)} {event.trading_pair} "
-               f"at {round(event.price, 2)}")
-        self.log_with_clock(logging.INFO, msg)
-        self.notify_hb_app_with_timestamp(msg)